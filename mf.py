@@ -2,11 +2,12 @@
 
 import argparse
 import numpy as np
+import os
 import sys
 
 from enum import IntEnum
-from sklearn.linear_model import LinearRegression
-from sklearn.utils import parse_version
+
+import mf_kernels
 
 
 class Column(IntEnum):
@@ -16,98 +17,164 @@ class Column(IntEnum):
     TEMPERATURE = 3
 
 
+# compute_all() keys in report order, with their display format
+METRICS: tuple[tuple[str, str], ...] = (
+    ("ti", ".3f"),
+    ("tf5", ".3f"),
+    ("tf15", ".3f"),
+    ("sdi5", ".2f"),
+    ("sdi15", ".2f"),
+    ("mfi", ".3f"),
+    ("avg_temp", ".3f"),
+)
+
+
+def sdi(ti: float, tf: float, minutes: int) -> float:
+    return (1 - ti / tf) * 100 / minutes
+
+
 class MembraneFouling:
     def __init__(self, date: str, time: str, sdi: str, ti: str, tf: str, status: str):
-        self.date = date.split(",")[1]
-        self.time = time.split(",")[1]
-        self.sdi = float(sdi.split(",")[1])
-        self.ti = float(ti.split(",")[1])
-        self.tf = float(tf.split(",")[1])
-        self.status = status.split(",")[1]
+        self.date = date
+        self.time = time
+        self.sdi = float(sdi)
+        self.ti = float(ti)
+        self.tf = float(tf)
+        self.status = status
 
-        self.data:list[list[float]] = []
+        # one contiguous array per Column, so a column scan never strides over the others
+        self.cols: tuple[np.ndarray, ...] = tuple(np.empty(0, dtype=np.float64) for _ in Column)
+        self.monotonic: tuple[bool, ...] = tuple(False for _ in Column)
 
 
     def __str__(self):
         return f"Membrane Fouling [date:{self.date}, time:{self.time}, sdi:{self.sdi}, ti:{self.ti}, tf:{self.tf}, status:{self.status}]" 
 
 
-    def add_data(self, raw) -> None:
-        self.data.append([float(x) for x in raw.split(",")])
+    def set_data(self, arr: np.ndarray) -> None:
+        arr = np.asarray(arr, dtype=np.float64)
+        self.cols = tuple(np.ascontiguousarray(arr[:, column]) for column in Column)
 
+        # time and volume normally grow along a run, but sensor jitter can break that
+        self.monotonic = tuple(
+            column in (Column.TIME, Column.VOLUME) and bool(np.all(np.diff(self.cols[column]) >= 0))
+            for column in Column
+        )
 
-    def search_index(self, column: Column, value: float) -> tuple[int, list[float]]:
-        closest = self.data[1]
-        closest_index = 1
 
-        for n, d in enumerate(self.data):
-            if abs(d[column] - value) < abs(closest[column] - value):
-                closest = d
-                closest_index = n
+    def search_index(self, column: Column, value: float) -> tuple[int, np.ndarray]:
+        # bisect columns that never decrease, scan the rest
+        if self.monotonic[column]:
+            i = mf_kernels.search_sorted_index(self.cols[column], value)
+        else:
+            i = mf_kernels.search_index(self.cols[column], value)
 
-        return closest_index, closest
+        return i, np.array([col[i] for col in self.cols])
 
 
-    def search(self, column: Column, value: float) -> list[float]:
+    def search(self, column: Column, value: float) -> np.ndarray:
         _, res = self.search_index(column, value)
         return res
 
     
+    def search_ti(self) -> float:
+        return float(self.search(Column.VOLUME, 500)[Column.TIME])
+
+
+    def search_tf(self, minutes: int) -> tuple[float, int]:
+        # tf after the given minutes, and the row index of that minute mark
+        i, row = self.search_index(Column.TIME, minutes*60)
+        t_total = float(self.search(Column.VOLUME, row[Column.VOLUME] + 500)[Column.TIME])
+        return t_total - minutes*60, i
+
+
     def calc_ti(self) -> float:
-        data = self.search(Column.VOLUME, 500)
-        return data[Column.TIME]
+        return self.search_ti()
 
 
     def calc_tf5(self) -> float:
-        v5 = self.search(Column.TIME, 5*60)[Column.VOLUME]
-        t_total = self.search(Column.VOLUME, v5 + 500)[Column.TIME]
-        return t_total - 5*60
+        tf5, _ = self.search_tf(5)
+        return tf5
 
 
     def calc_tf15(self) -> float:
-        v15 = self.search(Column.TIME, 15*60)[Column.VOLUME]
-        t_total = self.search(Column.VOLUME, v15 + 500)[Column.TIME]
-        return t_total - 15*60
+        tf15, _ = self.search_tf(15)
+        return tf15
 
 
     def calc_sdi15(self) -> float:
-         return (1 - self.calc_ti() / self.calc_tf15()) * 100 / 15  
+        return sdi(self.calc_ti(), self.calc_tf15(), 15)
 
 
     def calc_sdi5(self) -> float:
-         return (1 - self.calc_ti() / self.calc_tf5()) * 100 / 5  
+        return sdi(self.calc_ti(), self.calc_tf5(), 5)
 
 
     def calc_avg_temp(self) -> float:
-        return sum([x[Column.TEMPERATURE] for x in self.data])/len(self.data)
+        return float(self.cols[Column.TEMPERATURE].mean())
 
 
     def calc_mfi(self) -> float:
         v5i, _ = self.search_index(Column.TIME, 5*60)
         v15i, _ = self.search_index(Column.TIME, 15*60)
-        x = np.array([x[Column.VOLUME] / 1000 for x in self.data[v5i:v15i + 1]]).reshape((-1,1))
-        y = np.array([x[Column.TIME] / (x[Column.VOLUME] / 1000) for x in self.data[v5i:v15i + 1]])
 
-        model = LinearRegression()
-        model.fit(x, y)
-        r_sq = model.coef_[0]
+        return mf_kernels.mfi_slope(self.cols[Column.TIME], self.cols[Column.VOLUME], v5i, v15i)
 
-        return float(r_sq)
+
+    def compute_all(self) -> dict[str, float]:
+        ti = self.search_ti()
+
+        # the 5 and 15 minute rows are shared by tf5/tf15 and the mfi slope
+        tf5, v5i = self.search_tf(5)
+        tf15, v15i = self.search_tf(15)
+
+        return {
+            "ti": ti,
+            "tf5": tf5,
+            "tf15": tf15,
+            "sdi5": sdi(ti, tf5, 5),
+            "sdi15": sdi(ti, tf15, 15),
+            "mfi": mf_kernels.mfi_slope(self.cols[Column.TIME], self.cols[Column.VOLUME], v5i, v15i),
+            "avg_temp": self.calc_avg_temp(),
+        }
 
 
 def parse(filename : str) -> MembraneFouling:
-    with open(filename) as f:
-        data = f.read()
+    with open(filename, buffering=1 << 20) as f:
+        header = []
+        for i, line in enumerate(f):
+            # lines 1-6 are "name,value" pairs, line 7 holds the column names
+            if i == 7:
+                break
+            if i >= 1:
+                header.append(line.rstrip("\r\n").split(",")[1])
 
-    lines = data.strip().split("\n")
-    mf = MembraneFouling(*lines[1:7])
+        mf = MembraneFouling(*header)
 
-    for line in lines[8:]:
-        mf.add_data(line)
+        # the file object is now past the column names, stream the rest
+        mf.set_data(np.loadtxt(f, delimiter=",", dtype=np.float64, ndmin=2))
 
     return mf
 
 
+def parse_and_compute(path: str, filename: str) -> list[str]:
+    mf = parse(os.path.join(path, filename))
+
+    data = []
+    data.append(filename)
+    data.append(mf.date)
+    data.append(mf.time)
+    data.append(str(mf.sdi))
+    data.append(str(mf.ti))
+    data.append(str(mf.tf))
+    data.append(mf.status)
+
+    res = mf.compute_all()
+    data.extend(format(res[name], spec) for name, spec in METRICS)
+
+    return data
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='Membrane Fouling data processing', description='Calsulate Membrane Fouling metrics')
     parser.add_argument('-f', '--file', required=True, help="csv file to be processed")
@@ -116,12 +183,9 @@ if __name__ == "__main__":
 
     mf = parse(args.file)
 
+    res = mf.compute_all()
+
     print(mf)
-    print(f'ti       : {mf.calc_ti():.3f}')
-    print(f'tf5      : {mf.calc_tf5():.3f}')
-    print(f'tf15     : {mf.calc_tf15():.3f}')
-    print(f'sdi5     : {mf.calc_sdi5():.2f}')
-    print(f'sdi15    : {mf.calc_sdi15():.2f}')
-    print(f'mfi      : {mf.calc_mfi():.3f}')
-    print(f'avg temp : {mf.calc_avg_temp():.3f}')
+    for name, spec in METRICS:
+        print(f'{name.replace("_", " "):<9}: {res[name]:{spec}}')
 
@@ -0,0 +1,46 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, the kernels are plain numpy and run as-is without it
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+@njit(cache=True, nogil=True)
+def search_index(col: np.ndarray, value: float) -> int:
+    return int(np.abs(col - value).argmin())
+
+
+@njit(cache=True, nogil=True)
+def search_sorted_index(col: np.ndarray, value: float) -> int:
+    i = int(np.searchsorted(col, value))
+
+    if i == len(col) or (i > 0 and abs(col[i - 1] - value) <= abs(col[i] - value)):
+        # step back to the first row of a run of repeated values, like the linear scan
+        return int(np.searchsorted(col, col[i - 1]))
+
+    return i
+
+
+@njit(cache=True, nogil=True)
+def mfi_slope(t: np.ndarray, v: np.ndarray, v5i: int, v15i: int) -> float:
+    # too few points between the 5 and 15 minute marks to fit a line
+    if v15i - v5i < 2:
+        return np.nan
+
+    x = v[v5i:v15i + 1] / 1000
+    y = t[v5i:v15i + 1] / x
+
+    # least squares slope of t/V over V
+    xm = x.mean()
+    ym = y.mean()
+    sxx = ((x - xm) ** 2).sum()
+
+    if sxx == 0:
+        return np.nan
+
+    return float(((x - xm) * (y - ym)).sum() / sxx)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from mf import Column, MembraneFouling
+
+
+def make_mf(time: list[float], volume: list[float]) -> MembraneFouling:
+    mf = MembraneFouling("2024-01-01", "10:00", "0", "0", "0", "OK")
+    n = len(time)
+    mf.set_data(np.column_stack([time, np.zeros(n), volume, np.zeros(n)]))
+    return mf
+
+
+def linear_index(col: list[float], value: float) -> int:
+    return int(np.abs(np.asarray(col) - value).argmin())
+
+
+def test_search_matches_linear_scan():
+    volume = [0, 1, 1, 1, 2, 5, 5, 8]
+    mf = make_mf(list(range(len(volume))), volume)
+    assert mf.monotonic[Column.VOLUME]
+
+    # repeated values, ties between neighbours and values past either end
+    for value in (1.2, 1.0, 0.5, 3.5, 5.0, 6.5, -3.0, 20.0):
+        i, _ = mf.search_index(Column.VOLUME, value)
+        assert i == linear_index(volume, value), value
+
+    assert mf.search_index(Column.VOLUME, 1.2)[0] == 1
+
+
+def test_search_non_monotonic_volume():
+    volume = [0, 1, 3, 2, 4, 5, 7, 6, 8]
+    mf = make_mf(list(range(len(volume))), volume)
+    assert not mf.monotonic[Column.VOLUME]
+
+    for value in (2.1, 2.9, 6.2, 7.0):
+        i, _ = mf.search_index(Column.VOLUME, value)
+        assert i == linear_index(volume, value), value
@@ -1,9 +1,13 @@
 #!/usr/bin/env python
 
+import multiprocessing
 import os
 import sys
 import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from enum import Enum
+from functools import partial
 
 from PySide6 import QtCore, QtWidgets
 from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
@@ -12,7 +16,7 @@ from PySide6.QtWidgets import (QGroupBox, QHBoxLayout, QHeaderView, QLabel,
                                QLineEdit, QPushButton, QTableWidget,
                                QTableWidgetItem, QVBoxLayout)
 
-from mf import MembraneFouling
+from mf import parse_and_compute
 
 
 class State(Enum):
@@ -26,56 +30,6 @@ class WorkerSignals(QObject):
     result = Signal(list)
 
 
-class FileWorker(QRunnable):
-    def __init__(self, path: str, filename: str):
-        super(FileWorker, self).__init__()
-
-        self.filename: str = filename
-        self.path = path
-
-        self.mf: MembraneFouling | None = None
-
-        self.signals = WorkerSignals()
-
-    def parse(self) -> None:
-        with open(os.path.join(self.path, self.filename)) as f:
-            data = f.read()
-
-        lines = data.strip().split("\n")
-        self.mf = MembraneFouling(*lines[1:7])
-
-        for line in lines[8:]:
-            self.mf.add_data(line)
-
-    @QtCore.Slot()
-    def run(self):
-        try:
-            self.parse()
-            assert(self.mf is not None)
-
-            data = []
-            data.append(self.filename)
-            data.append(self.mf.date)
-            data.append(self.mf.time)
-            data.append(str(self.mf.sdi))
-            data.append(str(self.mf.ti))
-            data.append(str(self.mf.tf))
-            data.append(self.mf.status)
-            data.append(f'{self.mf.calc_ti():.3f}')
-            data.append(f'{self.mf.calc_tf5():.3f}')
-            data.append(f'{self.mf.calc_tf15():.3f}')
-            data.append(f'{self.mf.calc_sdi5():.2f}')
-            data.append(f'{self.mf.calc_sdi15():.2f}')
-            data.append(f'{self.mf.calc_mfi():.3f}')
-            data.append(f'{self.mf.calc_avg_temp():.3f}')
-
-            self.signals.result.emit(data)
-
-        except Exception as e:
-            print(f' Error processing file {self.filename}: {e}')
-            self.signals.error.emit(self.filename)
-
-
 class CSVWorker(QRunnable):
     def __init__(self, headers: list[str], data: dict[str, list[str]], state: dict[str, State], path: str, filename: str | None = None):
         super(CSVWorker, self).__init__()
@@ -98,16 +52,15 @@ class CSVWorker(QRunnable):
         fullpath = os.path.join(self.path, self.filename)
 
         try:
-            with open(fullpath, "w") as f:
-                f.write(','.join(self.headers))
-                f.write("\n")
+            rows = [','.join(self.headers)]
+            for filename, result in self.data.items():
+                if self.state[filename] != State.DONE:
+                    continue
 
-                for filename, result in self.data.items():
-                    if self.state[filename] != State.DONE:
-                        continue
+                rows.append(",".join(result))
 
-                    f.write(",".join(result))
-                    f.write("\n")
+            with open(fullpath, "w", buffering=1 << 20) as f:
+                f.write("\n".join(rows) + "\n")
 
             self.signals.result.emit([fullpath])
 
@@ -117,6 +70,9 @@ class CSVWorker(QRunnable):
 
 
 class MFWidget(QtWidgets.QWidget):
+    # emitted from the executor's callback thread, delivered on the ui thread
+    file_finished = Signal(str, object)
+
     def __init__(self):
         super().__init__()
 
@@ -124,14 +80,31 @@ class MFWidget(QtWidgets.QWidget):
         self.state: dict[str, State] = {}
         self.dir = ''
 
+        # rows of the table widget and the ones that need repainting
+        self.row_of: dict[str, int] = {}
+        self.dirty: set[str] = set()
+        self.update_pending = False
+
         self.init_ui()
 
         self.threadpool = QThreadPool()
 
-        self.timer = QTimer()
-        self.timer.setInterval(1000)
-        self.timer.timeout.connect(self.update_table)
-        self.timer.start()
+        # files are independent, so they are processed in parallel outside the GIL
+        self.executor = self.new_executor()
+
+        # the pending future of each file in the current folder
+        self.futures: dict[str, Future] = {}
+        self.file_finished.connect(self.file_done)
+
+    def new_executor(self) -> ProcessPoolExecutor:
+        # spawn, as forking this already multi-threaded qt process can deadlock the child.
+        # each spawned worker re-runs this script as __mp_main__ and so imports PySide6,
+        # a one-off start-up cost per worker since the pool keeps its workers alive
+        return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+    def closeEvent(self, event):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
 
     def init_ui(self):
         self.layout = QVBoxLayout(self)   # pyright: ignore
@@ -216,49 +189,88 @@ class MFWidget(QtWidgets.QWidget):
 
         self.layout.addWidget(export_group)
 
-    def update_table(self):
+    def reset_table(self):
         self.tableWidget.clear()
-
         self.tableWidget.setHorizontalHeaderLabels(self.table_headers)
+        self.tableWidget.setRowCount(len(self.data))
+
+        self.row_of = {}
+        for row, key in enumerate(sorted(self.data.keys())):
+            self.row_of[key] = row
+
+            for index in range(len(self.table_headers)):
+                item = QTableWidgetItem()
+                item.setFlags(QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEnabled)
+                self.tableWidget.setItem(row, index, item)
+
+        self.dirty = set(self.data.keys())
+        self.update_table()
+
+        # size every column once per folder, repaints only widen the columns they touch
+        self.tableWidget.resizeColumnsToContents()
+
+    def schedule_update(self):
+        # coalesce bursts of finished files into a single repaint
+        if self.update_pending:
+            return
+
+        self.update_pending = True
+        QTimer.singleShot(50, self.update_table)
+
+    def update_table(self):
+        self.update_pending = False
+
+        if not self.dirty:
+            return
+
+        widths = [0] * len(self.table_headers)
+
+        for key in self.dirty:
+            row = self.row_of.get(key)
+            if row is None:
+                continue
 
-        rowCount = 0
-        for key in sorted(self.data.keys()):
             data = self.data[key]
-            state = self.state[data[0]]
 
-            if rowCount >= self.tableWidget.rowCount():
-                self.tableWidget.insertRow(rowCount)
+            match self.state[key]:
+                case State.NEW:
+                    color = QColor.fromRgb(223, 231, 253)
+                case State.DONE:
+                    color = QColor.fromRgb(226, 236, 233)
+                case State.ERROR:
+                    color = QColor.fromRgb(250, 210, 225)
+                case _:
+                    color = QColor.fromRgb(255, 255, 255)
 
             for index in range(len(self.table_headers)):
-                item = QTableWidgetItem(data[index])
-
-                match state:
-                    case State.NEW:
-                        item.setBackground(QColor.fromRgb(223, 231, 253))
-                    case State.DONE:
-                        item.setBackground(QColor.fromRgb(226, 236, 233))
-                    case State.ERROR:
-                        item.setBackground(QColor.fromRgb(250, 210, 225))
-                    case _:
-                        item.setBackground(QColor.fromRgb(255, 255, 255))
+                item = self.tableWidget.item(row, index)
+                item.setText(data[index])
+                item.setBackground(color)
 
-                item.setFlags(QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEnabled)
-                self.tableWidget.setItem(rowCount, index, item)
+                hint = self.tableWidget.sizeHintForIndex(self.tableWidget.indexFromItem(item))
+                widths[index] = max(widths[index], hint.width())
 
-            rowCount += 1
+        self.dirty.clear()
 
-        self.tableWidget.resizeColumnsToContents()
-        self.tableWidget.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        # column 0 stretches, the others only grow to fit the rows that changed
+        grid = 1 if self.tableWidget.showGrid() else 0
+        for index in range(1, len(self.table_headers)):
+            if widths[index] + grid > self.tableWidget.columnWidth(index):
+                self.tableWidget.setColumnWidth(index, widths[index] + grid)
 
     @QtCore.Slot()
     def update_row(self, data: list[str]) -> None:
         print(f"Data Calculated: {data}")
         self.data[data[0]] = data
         self.state[data[0]] = State.DONE
+        self.dirty.add(data[0])
+        self.schedule_update()
 
     @QtCore.Slot()
     def update_error(self, filename: str) -> None:
         self.state[filename] = State.ERROR
+        self.dirty.add(filename)
+        self.schedule_update()
 
     @QtCore.Slot()
     def folder_click(self):
@@ -270,6 +282,11 @@ class MFWidget(QtWidgets.QWidget):
         self.dir = self.folder_textbox.text()
         files = os.listdir(path=str(self.dir))
 
+        # results still in flight belong to the previous folder
+        futures, self.futures = self.futures, {}
+        for future in futures.values():
+            future.cancel()
+
         self.data = {}
         self.state = {}
 
@@ -277,16 +294,52 @@ class MFWidget(QtWidgets.QWidget):
             self.data[filename] = [filename] + [''] * (len(self.table_headers) - 1)
             self.state[filename] = State.NEW
 
-        self.update_table()
+        self.reset_table()
 
     @QtCore.Slot()
     def calculate(self):
         for filename in sorted(self.data.keys()):
-            worker = FileWorker(self.dir, filename)
-            worker.signals.result.connect(self.update_row)
-            worker.signals.error.connect(self.update_error)
+            try:
+                future = self.executor.submit(parse_and_compute, self.dir, filename)
+
+            except BrokenProcessPool as e:
+                # a worker died and took the pool with it, files it had pending
+                # already failed through file_done, so start over with a new pool
+                print(f' Restarting worker pool: {e}')
+                self.executor.shutdown(wait=False)
+                self.executor = self.new_executor()
+
+                try:
+                    future = self.executor.submit(parse_and_compute, self.dir, filename)
+
+                except Exception as e:
+                    print(f' Error processing file {filename}: {e}')
+                    self.update_error(filename)
+                    continue
+
+            self.futures[filename] = future
+            future.add_done_callback(partial(self.file_finished.emit, filename))
+
+    @QtCore.Slot(str, object)
+    def file_done(self, filename: str, future: Future) -> None:
+        # drop results of a previous folder or of a superseded calculation
+        if self.futures.get(filename) is not future:
+            return
+
+        del self.futures[filename]
+
+        if future.cancelled():
+            return
+
+        try:
+            data = future.result()
+
+        except Exception as e:
+            print(f' Error processing file {filename}: {e}')
+            self.update_error(filename)
+            return
 
-            self.threadpool.start(worker)
+        self.update_row(data)
 
     @QtCore.Slot()
     def sucess_csv(self, filename: str):